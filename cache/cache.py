@@ -4,8 +4,7 @@ JSON files for faster algorithms performance.
 This should be run from the backend directory or via runprocessors
 """
 
-from functools import reduce
-import operator
+from itertools import chain
 import re
 from typing import Any
 
@@ -20,7 +19,24 @@ from cache.cache_config import (CACHE_CONFIG, CACHED_EQUIVALENTS_FILE,
                                            PROGRAMS_FORMATTED_FILE)
 from data.utility.data_helpers import read_data, write_data
 
-def cache_equivalents():
+# Patterns used to tokenise faculties and schools in cache_mappings.
+# Alternatives are tried in order from the start of the name, so the earlier
+# prefixes take priority wherever they appear. The named group which matched
+# holds the token.
+_FACULTY_RE = re.compile(r"""
+    .*?Faculty\sof\s(?P<faculty_of>[^\s\n\,]+)
+    | .*?UNSW\s(?P<unsw>[^\s\n\,]+)
+    | (?P<word>[\w]+)
+""", re.X)
+_SCHOOL_RE = re.compile(r"""
+    .*?School\sof\sthe\s(?P<school_of_the>[^\s\n\,]+)
+    | .*?School\sof\s(?P<school_of>[^\s\n\,]+)
+    | (?=UC).*?UC\s(?P<uc>[^\s\n\,]+)
+    | .*?UNSW\s(?P<unsw>[^\s\n\,]+)
+    | (?P<word>[\w]+)
+""", re.X)
+
+def cache_equivalents(courses: dict[str, Any] | None = None):
     """
     Reads from processed courses and stores the exclusions in a map mapping
     COURSE: {
@@ -30,9 +46,11 @@ def cache_equivalents():
     }
     NOTE: Should run this after all the conditions have been processed as sometimes
     exclusions are included inside the conditions text
+    `courses` may be given to avoid re-reading the processed courses
     """
 
-    courses = read_data(COURSES_PROCESSED_FILE)
+    if courses is None:
+        courses = read_data(COURSES_PROCESSED_FILE)
 
     cached_exclusions = {}
 
@@ -41,7 +59,7 @@ def cache_equivalents():
 
     write_data(cached_exclusions, CACHED_EQUIVALENTS_FILE)
 
-def cache_exclusions():
+def cache_exclusions(courses: dict[str, Any] | None = None):
     """
     Reads from processed courses and stores the exclusions in a map mapping
     COURSE: {
@@ -51,83 +69,64 @@ def cache_exclusions():
     }
     NOTE: Should run this after all the conditions have been processed as sometimes
     exclusions are included inside the conditions text
+    `courses` may be given to avoid re-reading the processed courses
     """
 
-    courses = read_data(COURSES_PROCESSED_FILE)
+    if courses is None:
+        courses = read_data(COURSES_PROCESSED_FILE)
 
     cached_exclusions = {}
 
     for course, data in courses.items():
-        cached_exclusions[course] = data["exclusions"] | data["equivalents"]
+        exclusions = data["exclusions"].copy()
+        exclusions.update(data["equivalents"])
+        cached_exclusions[course] = exclusions
 
     write_data(cached_exclusions, CACHED_EXCLUSIONS_FILE)
 
-def cache_mappings():
+def cache_mappings(courses: dict[str, Any] | None = None):
     """
     Writes to mappings.json and courseMappings.json (i.e maps courses to corresponding school/faculty)
+    `courses` may be given to avoid re-reading the processed courses
     """
     mappings = {}
-    courseMappings = {}
-    courses = read_data(COURSES_PROCESSED_FILE)
+    if courses is None:
+        courses = read_data(COURSES_PROCESSED_FILE)
 
     # Tokenise faculty using regex, e.g 'UNSW Business School' -> 'F Business'
     def tokeniseFaculty(Faculty):
-        faculty_token = "F "
-        if re.search("Faculty of.+", Faculty):
-            match_object = re.search("(?<=Faculty\sof\s)[^\s\n\,]+", Faculty)
-        elif re.search("UNSW", Faculty):
-            match_object = re.search(r"(?<=UNSW\s)[^\s\n\,]+", Faculty)
-        else:
-            match_object = re.search("^([\w]+)", Faculty)
-        match = match_object.group()
-        faculty_token += match
-        return faculty_token
+        match_object = _FACULTY_RE.match(Faculty)
+        return "F " + match_object.group(match_object.lastgroup)
 
     # Tokenise faculty using regex, e.g 'School of Psychology' -> 'S Psychology'
     def tokeniseSchool(School):
-        school_token = "S "
-        if re.search("School\sof\sthe.+", School):
-            match_object = re.search("(?<=School\sof\sthe\s)[^\s\n\,]+", School)
-        elif re.search("School\sof\s.+", School):
-            match_object = re.search("(?<=School\sof\s)[^\s\n\,]+", School)
-        elif re.search("^(UC)", School):
-            match_object = re.search("(?<=UC\s)[^\s\n\,]+", School)
-            match = school_token + "UC-" +  match_object.group()
-            return match
-        elif re.search("UNSW", School):
-            match_object = re.search("(?<=UNSW\s)[^\s\n\,]+", School)
-        else:
-            match_object = re.search("^([\w]+)", School)
-        match = match_object.group()
-        school_token += match
-        return school_token
-
-    # add faculties to mappings.json
-    for course in courses:
-        faculty = courses[course]['faculty']
-        if faculty not in mappings:
-            faculty_token = tokeniseFaculty(faculty)
-            mappings[faculty] = faculty_token
-            courseMappings[faculty_token] = {}
-    # add schools to mappings.json
-    for course in courses.values():
-        if 'school' in course:
-            school = course['school']
-            if school not in mappings:
-                school_token = tokeniseSchool(school)
-                mappings[school] = school_token
-                courseMappings[school_token] = {}
-    write_data(mappings, MAPPINGS_FILE)
-
-    # finalise
+        match_object = _SCHOOL_RE.match(School)
+        school_token = "S UC-" if match_object.lastgroup == "uc" else "S "
+        return school_token + match_object.group(match_object.lastgroup)
+
+    # add faculties then schools to mappings.json. There are only a handful
+    # of unique names, so each is tokenised once rather than once per course
+    faculties = dict.fromkeys(course['faculty'] for course in courses.values())
+    schools = dict.fromkeys(
+        school for course in courses.values()
+        if (school := course.get('school')) is not None
+    )
+    for faculty in faculties:
+        mappings[faculty] = tokeniseFaculty(faculty)
+    for school in schools:
+        if school not in mappings:
+            mappings[school] = tokeniseSchool(school)
+
+    # map every course to its faculty and school
+    courseMappings = {token: {} for token in mappings.values()}
     for course in courses.values():
         courseCode = course['code']
-        courseFaculty = course['faculty']
-        if 'school' in course:
-            courseSchool = course['school']
-            courseMappings[mappings[courseSchool]][courseCode] = 1
-        courseMappings[mappings[courseFaculty]][courseCode] = 1
+        school = course.get('school')
+        if school is not None:
+            courseMappings[mappings[school]][courseCode] = 1
+        courseMappings[mappings[course['faculty']]][courseCode] = 1
 
+    write_data(mappings, MAPPINGS_FILE)
     write_data(courseMappings, COURSE_MAPPINGS_FILE)
 
 def cache_program_mappings():
@@ -147,15 +146,20 @@ def cache_program_mappings():
 
     mappings = {
         code: {} for code
-        in reduce(operator.add, keyword_codes.values())
+        in chain.from_iterable(keyword_codes.values())
     }
 
     programs: dict[str, Any] = read_data(PROGRAMS_FORMATTED_FILE)
 
+    keywords_lower = [
+        (keyword.lower(), codes) for keyword, codes in keyword_codes.items()
+    ]
+
     for program in programs.values():
-        for keyword in keyword_codes.keys():
-            if keyword.lower() in program["title"].lower():
-                for code in keyword_codes[keyword]:
+        title = program["title"].lower()
+        for keyword, codes in keywords_lower:
+            if keyword in title:
+                for code in codes:
                     mappings[code][program["code"]] = 1
 
     write_data(mappings, PROGRAM_MAPPINGS_FILE)
@@ -4,6 +4,8 @@ Contains helper functions to assist with reading and writing data.
 import sys
 import json
 
+import orjson
+
 
 def read_data(file_name):
     """
@@ -21,6 +23,8 @@ def write_data(data, file_name):
     """
     Writes a json dump of given data to file with given file_name
     """
-    with open(file_name, "w", encoding="utf8") as OUTPUT_FILE:
-        json.dump(data, OUTPUT_FILE, indent=4)
+    with open(file_name, "wb") as OUTPUT_FILE:
+        OUTPUT_FILE.write(
+            orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
         print(f"{file_name} successfully created")
@@ -6,6 +6,7 @@ If you need to  bash this, use:
 """
 
 import argparse
+from functools import lru_cache
 import subprocess
 from sys import exit
 from typing import Callable
@@ -13,6 +14,7 @@ from typing import Callable
 
 from cache.cache import (cache_equivalents, cache_exclusions,
                                     cache_mappings, cache_program_mappings)
+from cache.cache_config import COURSES_PROCESSED_FILE
 from data.processors.courses_processing import process_course_data
 from data.processors.programs_processing import process_prg_data
 from data.processors.specialisations_processing import customise_spn_data
@@ -27,6 +29,7 @@ from data.scrapers.specialisations_formatting import format_spn_data
 from data.scrapers.specialisations_scraper import scrape_spn_data
 from data.scrapers.faculty_code_formatting import format_code_data
 from data.scrapers.enrolment_scraper import scrape_enrolment_data
+from data.utility.data_helpers import read_data
 
 parser = argparse.ArgumentParser()
 
@@ -85,12 +88,17 @@ def run_scrape_enrolment_data():
     else:
         scrape_enrolment_data(args.username, args.password)
 
+@lru_cache(maxsize=None)
+def processed_courses() -> dict:
+    """ reads the processed courses once, to be shared by the cache stages """
+    return read_data(COURSES_PROCESSED_FILE)
+
 
 run: dict[str, dict[str, Callable]] = {
     "cache": {
-        "exclusion": cache_exclusions,
-        "equivalent": cache_equivalents,
-        "mapping": cache_mappings,
+        "exclusion": lambda: cache_exclusions(processed_courses()),
+        "equivalent": lambda: cache_equivalents(processed_courses()),
+        "mapping": lambda: cache_mappings(processed_courses()),
         "program": cache_program_mappings
     },
     "faculty": {
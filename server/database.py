@@ -42,6 +42,8 @@ def overwrite_collection(collection_name):
             file_data = json.load(f)
             for key in file_data:
                 db[collection_name].insert_one(file_data[key])
+            # dropping the collection also drops its indexes
+            db[collection_name].create_index("code", unique=True)
 
             print(f"Finished overwriting {collection_name}")
         except (KeyError, IOError, OSError):
@@ -60,6 +62,8 @@ def overwrite_archives():
                 file_data = json.load(f)
                 for key in file_data:
                     archivesDB[str(year)].insert_one(file_data[key])
+                # getLegacyCourses filters each archive by term
+                archivesDB[str(year)].create_index("terms")
 
                 print(f"Finished overwriting {year} archive")
             except (KeyError, IOError, OSError):
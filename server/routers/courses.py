@@ -3,7 +3,7 @@ APIs for the /courses/ route.
 """
 from contextlib import suppress
 import re
-from typing import Dict, List, Mapping, Set, Tuple
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
 
 from data.config import ARCHIVED_YEARS, LIVE_YEAR
 from fastapi import APIRouter, HTTPException
@@ -18,6 +18,18 @@ router = APIRouter(
     tags=["courses"],
 )
 
+# archives are searched from the most recent year first
+_ARCHIVED_YEARS_DESC = sorted(ARCHIVED_YEARS, reverse=True)
+
+# a search term that looks like the start of a course code, eg: 'comp1'
+_COURSE_CODE_RE = re.compile(r'[a-z]{4}[0-9]')
+
+class SearchQuery(NamedTuple):
+    """ A search term, preprocessed once for `fuzzy_match` """
+    lower: str
+    words: Tuple[str, ...]
+    is_code: bool
+
 @router.get(
     "/getCourse/{courseCode}",
     response_model=CourseDetails,
@@ -66,23 +78,10 @@ def get_course(courseCode: str) -> Dict:
     - start with the current database
     - if not found, check the archives
     """
-    result = coursesCOL.find_one({"code": courseCode})
-    if not result:
-        for year in sorted(ARCHIVED_YEARS, reverse=True):
-            result = archivesDB[str(year)].find_one({"code": courseCode})
-            if result is not None:
-                result.setdefault("raw_requirements", "")
-                result["is_legacy"] = True
-                break
-    else:
-        result["is_legacy"] = False
-
-    if not result:
-        raise HTTPException(
-            status_code=400, detail=f"Course code {courseCode} was not found"
-        )
+    result = find_course(courseCode)
+    if result["is_legacy"]:
+        result.setdefault("raw_requirements", "")
     result.setdefault("school", None)
-    del result["_id"]
     with suppress(KeyError):
         del result["exclusions"]["leftover_plaintext"]
     return result
@@ -120,12 +119,12 @@ def regex_search(search_string: str) -> Mapping[str, str]:
     Uses the search string as a regex to match all courses with an exact pattern.
     """
 
-    pat = re.compile(search_string, re.I)
-    courses = list(coursesCOL.find({"code": {"$regex": pat}}))
+    query = {"code": {"$regex": search_string, "$options": "i"}}
+    courses = list(coursesCOL.find(query))
 
     if not courses:
-        for year in sorted(ARCHIVED_YEARS, reverse=True):
-            courses = list(archivesDB[str(year)].find({"code": {"$regex": pat}}))
+        for year in _ARCHIVED_YEARS_DESC:
+            courses = list(archivesDB[str(year)].find(query))
             if courses:
                 break
 
@@ -166,7 +165,10 @@ def get_legacy_courses(year, term) -> Dict[str, Dict[str, str]]:
     """
     Gets all the courses that were offered in that term for that year
     """
-    result = {c['code']: c['title'] for c in archivesDB[year].find() if term in c['terms']}
+    result = {
+        c['code']: c['title']
+        for c in archivesDB[year].find({"terms": term}, {"code": 1, "title": 1, "_id": 0})
+    }
 
     if not result:
         raise HTTPException(status_code=400, detail="Invalid term or year. Valid terms: T0, T1, T2, T3. Valid years: 2019, 2020, 2021, 2022.")
@@ -180,12 +182,7 @@ def get_legacy_course(year, courseCode) -> Dict:
         Like /getCourse/ but for legacy courses in the given year.
         Returns information relating to the given course
     """
-    result = archivesDB[str(year)].find_one({"code": courseCode})
-    if not result:
-        raise HTTPException(status_code=400, detail="invalid course code or year")
-    del result["_id"]
-    result["is_legacy"] = True
-    return result
+    return find_legacy_course(year, courseCode)
 
 @router.get(
     "/termsOffered/{course}/{years}",
@@ -234,9 +231,10 @@ def terms_offered(course: str, years:str) -> Dict:
         }
     """
     fails: List[str] = []
+    # each year is only looked up once, even if it is repeated
     terms = {
         year: map_suppressed_errors(get_term_offered, fails, course, year)
-        for year in years.split("+")
+        for year in dict.fromkeys(years.split("+"))
     }
 
     return {
@@ -254,33 +252,84 @@ def terms_offered(course: str, years:str) -> Dict:
 
 def unlocked_set(courses_state) -> Set[str]:
     """ Fetch the set of unlocked courses from the courses_state of a getAllUnlocked call """
-    return set(course for course in courses_state if courses_state[course]['unlocked'])
+    return {course for course, state in courses_state.items() if state['unlocked']}
+
+def make_search_query(search_term: str) -> SearchQuery:
+    """ Preprocess a search term once, so it can be matched against many courses """
+    lower = search_term.lower()
+    return SearchQuery(
+        lower=lower,
+        words=tuple(lower.split(' ')),
+        is_code=bool(_COURSE_CODE_RE.match(lower)),
+    )
 
-def fuzzy_match(course: Tuple[str, str], search_term: str) -> float:
-    """ Gives the course a weighting based on the relevance to the search """
+def fuzzy_match(course: Tuple[str, str], query: SearchQuery) -> float:
+    """
+    Gives the course a weighting based on the relevance to the search.
+    `query` should be built once per search with `make_search_query`.
+    """
     code, title = course
+    code = code.lower()
 
     # either match against a course code, or match many words against the title
     # (not necessarily in the same order as the title)
-    search_term = search_term.lower()
-    if re.match('[a-z]{4}[0-9]', search_term):
-        return fuzz.ratio(code.lower(), search_term) * 10
+    if query.is_code:
+        return fuzz.ratio(code, query.lower) * 10
 
-    return max(fuzz.ratio(code.lower(), search_term),
-               sum(fuzz.partial_ratio(title.lower(), word)
-                       for word in search_term.split(' ')))
+    title = title.lower()
+    return max(fuzz.ratio(code, query.lower),
+               sum(fuzz.partial_ratio(title, word) for word in query.words))
+
+def find_course(courseCode: str, projection: Optional[Dict]=None) -> Dict:
+    """
+    Find a course given its courseCode, with only the fields in `projection`
+    (by default, all but `_id`). Marks whether the course is legacy.
+    - start with the current database
+    - if not found, check the archives
+    Raises a 400 if it can't be found anywhere
+    """
+    projection = projection or {"_id": 0}
+    result = coursesCOL.find_one({"code": courseCode}, projection)
+    if result is not None:
+        result["is_legacy"] = False
+        return result
+
+    for year in _ARCHIVED_YEARS_DESC:
+        result = archivesDB[str(year)].find_one({"code": courseCode}, projection)
+        if result is not None:
+            result["is_legacy"] = True
+            return result
+
+    raise HTTPException(
+        status_code=400, detail=f"Course code {courseCode} was not found"
+    )
+
+def find_legacy_course(year: str | int, courseCode: str, projection: Optional[Dict]=None) -> Dict:
+    """
+    Find a course in the archives of the given year, with only the fields in
+    `projection` (by default, all but `_id`). Raises a 400 if it can't be found
+    """
+    result = archivesDB[str(year)].find_one({"code": courseCode}, projection or {"_id": 0})
+    if not result:
+        raise HTTPException(status_code=400, detail="invalid course code or year")
+    result["is_legacy"] = True
+    return result
 
-def get_course_info(course: str, year: str | int=LIVE_YEAR) -> Dict:
+def get_course_info(course: str, year: str | int=LIVE_YEAR, projection: Optional[Dict]=None) -> Dict:
     """
-    Returns the course info for the given course and year.
+    Returns the course info for the given course and year, with only the
+    fields in `projection` if given.
     If no year is given, the current year is used.
     If the year is not the LIVE_YEAR, then uses legacy information
     """
-    return get_course(course) if int(year) == int(LIVE_YEAR) else get_legacy_course(year, course)
+    if int(year) == int(LIVE_YEAR):
+        return find_course(course, projection)
+    return find_legacy_course(year, course, projection)
 
 def get_term_offered(course: str, year: int | str=LIVE_YEAR) -> List[str]:
     """
     Returns the terms in which the given course is offered, for the given year.
+    Only the terms are fetched, rather than the whole course.
     """
-    return get_course_info(course, year).get("terms", [])
+    return get_course_info(course, year, {"terms": 1, "_id": 0}).get("terms", [])
 
@@ -2,10 +2,13 @@
 API for fetching data about programs and specialisations """
 from contextlib import suppress
 import functools
+from itertools import chain
 import re
+import time
 from typing import Callable, Dict, List, Mapping, Optional, Tuple, cast
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 
 from data.processors.models import (
     CourseContainer,
@@ -24,13 +27,29 @@ from server.routers.model import (
     Structure,
     StructureContainer,
 )
-from server.routers.utility import get_core_courses
+from server.routers.utility import (
+    CACHE_MAX_AGE,
+    cacheable_response,
+    course_list_from_structure,
+    get_core_courses,
+)
 
+# routes return their payloads as ORJSONResponses directly, skipping FastAPI's
+# response validation and encoding, as they are only made of plain json types.
+# Response models are still given in `responses` to document the routes
 router = APIRouter(
     prefix="/programs",
     tags=["programs"],
+    default_response_class=ORJSONResponse,
 )
 
+# a full course code, eg: 'COMP1511'
+_COURSE_CODE_RE = re.compile(r"[A-Z]{4}[0-9]{4}")
+
+# the type of a specialisation by the last character of its code, eg: COMPA1.
+# Anything else is an honours
+_SPECIALISATION_TYPES = {"1": "Major", "2": "Minor"}
+
 
 @router.get("/")
 def programs_index() -> str:
@@ -40,9 +59,9 @@ def programs_index() -> str:
 
 @router.get(
     "/getPrograms",
-    response_model=Programs,
     responses={
         200: {
+            "model": Programs,
             "description": "Returns all programs",
             "content": {
                 "application/json": {
@@ -59,22 +78,23 @@ def programs_index() -> str:
         }
     },
 )
-def get_programs() -> dict[str, dict[str, str]]:
+def get_programs(request: Request) -> Response:
     """ Fetch all the programs the backend knows about in the format of { code: title } """
-    return {"programs": {q["code"]: q["title"] for q in programsCOL.find()}}
+    programs = programsCOL.find({}, {"code": 1, "title": 1, "_id": 0})
+    return cacheable_response(request, {"programs": {q["code"]: q["title"] for q in programs}})
 
 
 def convert_subgroup_object_to_courses_dict(object: str, description: str|list[str]) -> Mapping[str, str | list[str]]:
     """ Gets a subgroup object (format laid out in the processor) and fetches the exact courses its referring to """
     if " or " in object and isinstance(description, list):
         return {c: description[index] for index, c in enumerate(object.split(" or "))}
-    if not re.match(r"[A-Z]{4}[0-9]{4}", object):
+    if not _COURSE_CODE_RE.match(object):
         return regex_search(rf"^{object}")
 
     return { object: description }
 
-def add_subgroup_container(structure: dict[str, StructureContainer], type: str, container: ProgramContainer | CourseContainer, exceptions: list[str]) -> list[str]:
-    """ Returns the added courses """
+def add_subgroup_container(structure: dict[str, StructureContainer], type: str, container: ProgramContainer | CourseContainer, exceptions: set[str]) -> list[str]:
+    """ Returns the added courses, leaving out any courses in `exceptions` """
     # TODO: further standardise non_spec_data to remove these lines:
     title = container.get("title", "")
     if container.get("type") == "gened":
@@ -84,13 +104,13 @@ def add_subgroup_container(structure: dict[str, StructureContainer], type: str,
         type = "Rules"
     structure[type]["content"][title] = {
         "UOC": container.get("credits_to_complete") or 0,
-        "courses": functools.reduce(
-            lambda rest, current: rest | {
-                course: description for course, description
-                in convert_subgroup_object_to_courses_dict(current[0], current[1]).items()
-                if course not in exceptions
-            }, container.get("courses", {}).items(), {}
-        ),
+        "courses": {
+            course: description
+            for object, object_description in container.get("courses", {}).items()
+            for course, description
+            in convert_subgroup_object_to_courses_dict(object, object_description).items()
+            if course not in exceptions
+        },
         "type": container.get("type", ""),
         "notes": container.get("notes", "") if type == "Rules" else ""
     }
@@ -104,55 +124,51 @@ def add_geneds_courses(programCode: str, structure: dict[str, StructureContainer
     item = structure["General"]["content"]["General Education"]
     item["courses"] = {}
     if container.get("courses") is None:
-        gen_ed_courses = list(set(get_gen_eds(programCode)["courses"].keys()) - set(sum(
-            (
-                sum((
-                    list(value["courses"].keys())
-                    for sub_group, value in spec["content"].items()
-                    if 'core' in sub_group.lower()
-                ), [])
+        geneds = program_gen_eds(programCode)
+        core_courses = set(chain.from_iterable(
+            value["courses"].keys()
             for spec_name, spec in structure.items()
-            if "Major" in spec_name or "Honours" in spec_name)
-        , [])))
-        geneds = get_gen_eds(programCode)
-        item["courses"] = {course: geneds["courses"][course] for course in gen_ed_courses}
+            if "Major" in spec_name or "Honours" in spec_name
+            for sub_group, value in spec["content"].items()
+            if 'core' in sub_group.lower()
+        ))
+        gen_ed_courses = geneds.keys() - core_courses
+        item["courses"] = {course: geneds[course] for course in gen_ed_courses}
 
 
     return list(item["courses"].keys())
 
 
-def add_specialisation(structure: dict[str, StructureContainer], code: str) -> None:
-    """ Add a specialisation to the structure of a getStructure call """
+def add_specialisation(structure: dict[str, StructureContainer], code: str, spnResult: Optional[Specialisation]) -> None:
+    """
+    Add a specialisation to the structure of a getStructure call.
+    `spnResult` is the specialisation with the given code, or None if it does not exist
+    """
     # in a specialisation, the first container takes priority - no duplicates may exist
-    if code.endswith("1"):
-        type = "Major"
-    elif code.endswith("2"):
-        type = "Minor"
-    else:
-        type = "Honours"
-
-    spnResult = cast(Specialisation | None, specialisationsCOL.find_one({"code": code}))
-    type = f"{type} - {code}"
+    type = f"{_SPECIALISATION_TYPES.get(code[-1:], 'Honours')} - {code}"
     if not spnResult:
         raise HTTPException(
             status_code=400, detail=f"{code} of type {type} not found")
     structure[type] = {"name": spnResult["name"], "content": {}}
     # NOTE: takes Core Courses are first
-    exceptions: list[str] = []
-    for cores in filter(lambda a: "Core" in a["title"], spnResult["curriculum"]):
-        new = add_subgroup_container(structure, type, cores, exceptions)
-        exceptions.extend(new)
-
+    cores: list[CourseContainer] = []
+    others: list[CourseContainer] = []
     for container in spnResult["curriculum"]:
-        if "Core" not in container["title"]:
-            add_subgroup_container(structure, type, container, exceptions)
+        (cores if "Core" in container["title"] else others).append(container)
+
+    exceptions: set[str] = set()
+    for container in cores:
+        exceptions.update(add_subgroup_container(structure, type, container, exceptions))
+
+    for container in others:
+        add_subgroup_container(structure, type, container, exceptions)
 
 @router.get(
     "/getStructure/{programCode}/{spec}",
-    response_model=Structure,
     responses={
         400: { "description": "Uh oh you broke me" },
         200: {
+            "model": Structure,
             "description": "Returns the program structure",
             "content": {
                 "application/json": {
@@ -227,28 +243,18 @@ def add_specialisation(structure: dict[str, StructureContainer], code: str) -> N
         }
     }
 )
-@router.get("/getStructure/{programCode}", response_model=Structure)
+@router.get("/getStructure/{programCode}", responses={200: {"model": Structure}})
 def get_structure(
-    programCode: str, spec: Optional[str] = None
-):
+    request: Request, programCode: str, spec: Optional[str] = None
+) -> Response:
     """ get the structure of a course given specs and program code """
-    # TODO: This ugly, use compose instead
-    structure: dict[str, StructureContainer] = {}
-    structure = add_specialisations(structure, spec)
-    structure, uoc = add_program_code_details(structure, programCode)
-    structure = add_geneds_to_structure(structure, programCode)
-    apply_manual_fixes(structure, programCode)
-
-    return {
-        "structure": structure,
-        "uoc": uoc,
-    }
+    return cacheable_response(request, build_structure(programCode, spec))
 
-@router.get("/getStructureCourseList/{programCode}/{spec}", response_model=CourseCodes)
-@router.get("/getStructureCourseList/{programCode}", response_model=CourseCodes)
+@router.get("/getStructureCourseList/{programCode}/{spec}", responses={200: {"model": CourseCodes}})
+@router.get("/getStructureCourseList/{programCode}", responses={200: {"model": CourseCodes}})
 def get_structure_course_list(
         programCode: str, spec: Optional[str]=None
-    ):
+    ) -> ORJSONResponse:
     """
         Similar to `/getStructure` but, returns a raw list of courses with no further
         nesting or categorisation.
@@ -259,18 +265,18 @@ def get_structure_course_list(
     structure, _ = add_program_code_details(structure, programCode)
     apply_manual_fixes(structure, programCode)
 
-    return {
+    return ORJSONResponse({
         "courses": course_list_from_structure(structure),
-    }
+    })
 
 @router.get(
     "/getGenEds/{programCode}",
-    response_model=Courses,
     responses={
         400: {
             "description": "The given program code could not be found in the database",
         },
         200: {
+            "model": Courses,
             "description": "Returns all geneds available to a given to the given code",
             "content": {
                 "application/json": {
@@ -288,42 +294,75 @@ def get_structure_course_list(
         },
     },
 )
-def get_gen_eds(programCode: str):
+def get_gen_eds(request: Request, programCode: str) -> Response:
     """ fetches gen eds from file """
-    all_geneds = data_helpers.read_data("data/scrapers/genedPureRaw.json")[programCode]
-    return {"courses" : all_geneds}
+    return cacheable_response(request, {"courses" : program_gen_eds(programCode)})
 
 @router.get("/getCores/{programCode}/{spec}")
-def get_cores(programCode: str, spec: str):
-    return get_core_courses(programCode, spec.split('+'))
+def get_cores(request: Request, programCode: str, spec: str) -> Response:
+    return cacheable_response(request, get_core_courses(programCode, spec.split('+')))
 
 ###############################################################
 #                       End of Routes                         #
 ###############################################################
 
-def course_list_from_structure(structure: dict) -> list[str]:
+# Programs and specialisations only change when the database is overwritten,
+# so lookups are cached as { code: (expiry, document) } for as long as the
+# responses built from them may be cached by clients. A running server does not
+# see the database being overwritten, so it serves the old documents until they
+# expire, or until it restarts. Codes which are not found are never cached, as
+# they may just not be loaded yet. The cached documents are shared, and must
+# not be mutated
+_PROGRAMS: dict[str, tuple[float, Program]] = {}
+_SPECIALISATIONS: dict[str, tuple[float, Specialisation]] = {}
+
+def get_program(programCode: str) -> Optional[Program]:
+    """ Fetch a program by its code, or None if it does not exist """
+    now = time.monotonic()
+    expiry, program = _PROGRAMS.get(programCode, (now, None))
+    if expiry <= now:
+        program = cast(Optional[Program], programsCOL.find_one({"code": programCode}))
+        if program is not None:
+            _PROGRAMS[programCode] = (now + CACHE_MAX_AGE, program)
+    return program
+
+def get_specialisations(codes: list[str]) -> dict[str, Specialisation]:
     """
-        Given a formed structure, return the list of courses
-        in that structure
+    Fetch the specialisations with the given codes as { code: specialisation },
+    leaving out codes which do not exist. Any which are not cached yet, or have
+    expired, are fetched together in one query
     """
-    courses = []
-    def __recursive_course_search(structure: dict) -> None:
-        """
-            Recursively search for courses in a structure. Add
-            courses found to `courses` object in upper group.
-        """
-        if not isinstance(structure, (list, dict)):
-            return
-        for k, v in structure.items():
-            with suppress(KeyError):
-                if not isinstance(v, dict) or "rule" in v["type"]:
-                    continue
-            if "courses" in k:
-                courses.extend(v.keys())
-            __recursive_course_search(v)
-        return
-    __recursive_course_search(structure)
-    return courses
+    now = time.monotonic()
+    missing = [code for code in codes if _SPECIALISATIONS.get(code, (now, None))[0] <= now]
+    for code in missing:
+        _SPECIALISATIONS.pop(code, None)
+    if missing:
+        for spnResult in specialisationsCOL.find({"code": {"$in": missing}}):
+            _SPECIALISATIONS[spnResult["code"]] = (now + CACHE_MAX_AGE, cast(Specialisation, spnResult))
+    return {code: _SPECIALISATIONS[code][1] for code in codes if code in _SPECIALISATIONS}
+
+def build_structure(programCode: str, spec: Optional[str] = None) -> dict:
+    """ Builds the `/getStructure` payload, for use outside of the route """
+    # TODO: This ugly, use compose instead
+    structure: dict[str, StructureContainer] = {}
+    structure = add_specialisations(structure, spec)
+    structure, uoc = add_program_code_details(structure, programCode)
+    structure = add_geneds_to_structure(structure, programCode)
+    apply_manual_fixes(structure, programCode)
+
+    return {
+        "structure": structure,
+        "uoc": uoc,
+    }
+
+@functools.lru_cache(maxsize=None)
+def _load_gen_eds() -> dict[str, dict[str, str]]:
+    """ Read the gen eds of every program once. The result is shared, and must not be mutated """
+    return data_helpers.read_data("data/scrapers/genedPureRaw.json")
+
+def program_gen_eds(programCode: str) -> dict[str, str]:
+    """ The gen eds available to the given program, as { code: title } """
+    return _load_gen_eds()[programCode]
 
 def add_specialisations(structure: dict[str, StructureContainer], spec: Optional[str]) -> dict[str, StructureContainer]:
     """
@@ -331,9 +370,10 @@ def add_specialisations(structure: dict[str, StructureContainer], spec: Optional
         them to the structure
     """
     if spec:
-        specs = spec.split("+") if "+" in spec else [spec]
+        specs = spec.split("+")
+        specialisations = get_specialisations(specs)
         for m in specs:
-            add_specialisation(structure, m)
+            add_specialisation(structure, m, specialisations.get(m))
     return structure
 
 def add_program_code_details(structure: dict[str, StructureContainer], programCode: str) -> Tuple[dict[str, StructureContainer], int]:
@@ -343,7 +383,7 @@ def add_program_code_details(structure: dict[str, StructureContainer], programCo
         - structure
         - uoc (int) associated with the program code.
     """
-    programsResult = cast(Optional[Program], programsCOL.find_one({"code": programCode}))
+    programsResult = get_program(programCode)
     if not programsResult:
         raise HTTPException(
             status_code=400, detail="Program code was not found")
@@ -357,14 +397,14 @@ def add_geneds_to_structure(structure: dict[str, StructureContainer], programCod
         Insert geneds of the given programCode into the structure
         provided
     """
-    programsResult = cast(Program | None, programsCOL.find_one({"code": programCode}))
+    programsResult = get_program(programCode)
     if programsResult is None:
         raise HTTPException(
             status_code=400, detail="Program code was not found")
 
     with suppress(KeyError):
         for container in programsResult['components']['non_spec_data']:
-            add_subgroup_container(structure, "General", container, [])
+            add_subgroup_container(structure, "General", container, set())
             if container.get("type") == "gened":
                 add_geneds_courses(programCode, structure, container)
     return structure
@@ -373,9 +413,16 @@ def add_geneds_to_structure(structure: dict[str, StructureContainer], programCod
 def compose(*functions: Callable) -> Callable:
     """
         Compose a list of functions into a single function.
-        The functions are applied in the order they are given.
+        As in maths, the last function is applied first, ie:
+            compose(f, g)(x) == f(g(x))
     """
-    return functools.reduce(lambda f, g: lambda *args, **kwargs: f(g(*args, **kwargs)), functions)
+    first, *rest = reversed(functions)
+    def composed(*args, **kwargs):
+        result = first(*args, **kwargs)
+        for function in rest:
+            result = function(result)
+        return result
+    return composed
 
 def proto_edges_to_edges(proto_edges: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
@@ -389,23 +436,22 @@ def proto_edges_to_edges(proto_edges: List[Dict[str, str]]) -> List[Dict[str, st
     ]
     Effectively, turning an adjacency list into a flat list of edges
     """
-    edges: List = []
-    for proto_edge in proto_edges:
-        # Incoming: { original: str,  courses: List[str]}
-        # Outcome:  { "src": str, "target": str }
-        if not proto_edge or not proto_edge["courses"]:
-            continue
-        for course in proto_edge["courses"]:
-            edges.append({
-                    "source": course,
-                    "target": proto_edge["original"],
-                }
-            )
-    return edges
+    # Incoming: { original: str,  courses: List[str]}
+    # Outcome:  { "src": str, "target": str }
+    return [
+        {
+            "source": course,
+            "target": proto_edge["original"],
+        }
+        for proto_edge in proto_edges
+        if proto_edge and proto_edge["courses"]
+        for course in proto_edge["courses"]
+    ]
 
 def prune_edges(edges: List[Dict[str, str]], courses: List[str]) -> List[Dict[str, str]]:
     """
     Remove edges between vertices that are not in the list of courses provided.
     """
-    return [edge for edge in edges if edge["source"] in courses and edge["target"] in courses]
+    course_set = frozenset(courses)
+    return [edge for edge in edges if edge["source"] in course_set and edge["target"] in course_set]
 
@@ -3,9 +3,18 @@ General purpose utility functions for the server, that do not fit
 specifically in any one function
 """
 
-
+import hashlib
+from itertools import chain
 from typing import Any, Callable, List
 
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+# the scraped data is regenerated at most daily, so responses built from it
+# can be reused by browsers and proxies for a while
+CACHE_MAX_AGE = 3600
+CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}"
+
 def map_suppressed_errors(func: Callable, errors_log: List[Any], *args, **kwargs) -> Any:
     """
     Map a function to a list of arguments, and return the result of the function
@@ -17,18 +26,51 @@ def map_suppressed_errors(func: Callable, errors_log: List[Any], *args, **kwargs
         errors_log.append((*args, e))
     return None
 
+def cacheable_response(request: Request, content: Any) -> Response:
+    """
+    Serialise `content` into a response which may be cached, tagged with an
+    ETag of its body. If the request already holds that ETag, or asks with
+    `If-None-Match: *`, an empty 304 Not Modified is returned instead.
+    The ETag is weak, as the same tag is sent for gzipped and plain bodies
+    """
+    response = ORJSONResponse(content, headers={"Cache-Control": CACHE_CONTROL})
+    opaque_tag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+    etag = f"W/{opaque_tag}"
+    if_none_match = {
+        tag.strip().removeprefix("W/")
+        for tag in request.headers.get("if-none-match", "").split(",")
+    }
+    if opaque_tag in if_none_match or "*" in if_none_match:
+        return Response(status_code=304, headers={"Cache-Control": CACHE_CONTROL, "ETag": etag})
+
+    response.headers["ETag"] = etag
+    return response
+
+def course_list_from_structure(structure: dict) -> list[str]:
+    """
+        Given a formed structure, return the list of courses
+        in that structure
+    """
+    courses: list[str] = []
+    # depth first, visiting items in the same order as the structure
+    stack = list(reversed(structure.items()))
+    while stack:
+        k, v = stack.pop()
+        if not isinstance(v, dict) or "rule" in (v.get("type") or ""):
+            continue
+        if k == "courses":
+            courses.extend(v.keys())
+        stack.extend(reversed(v.items()))
+    return courses
+
 def get_core_courses(program: str, specialisations: list[str]):
-    from server.routers.programs import get_structure
-
-    req = get_structure(program, "+".join(specialisations))
-    return sum(
-            (
-                sum((
-                    list(value["courses"].keys())
-                    for sub_group, value in spec["content"].items()
-                    if 'core' in sub_group.lower()
-                ), [])
-            for spec_name, spec in req["structure"].items()
-            if "Major" in spec_name or "Honours" in spec_name)
-         , [])
+    from server.routers.programs import build_structure
 
+    req = build_structure(program, "+".join(specialisations))
+    return list(chain.from_iterable(
+        value["courses"].keys()
+        for spec_name, spec in req["structure"].items()
+        if "Major" in spec_name or "Honours" in spec_name
+        for sub_group, value in spec["content"].items()
+        if 'core' in sub_group.lower()
+    ))
@@ -4,27 +4,40 @@ Configure the FastAPI server
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from data.config import LIVE_YEAR
 
+from server.database import coursesCOL, programsCOL, specialisationsCOL
 from server.routers import courses, programs, specialisations
 
 app = FastAPI()
 
-origins = "*"
+origins = ["*"]
 
+# credentials cannot be used with a wildcard origin, so they are not allowed
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_credentials=False,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type"],
 )
+# structures and gen eds are large, and compress well
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 app.include_router(courses.router)
 app.include_router(programs.router)
 app.include_router(specialisations.router)
 
 
+@app.on_event("startup")
+def ensure_indexes() -> None:
+    """ courses, programs and specialisations are all looked up by their code """
+    coursesCOL.create_index("code", unique=True)
+    programsCOL.create_index("code", unique=True)
+    specialisationsCOL.create_index("code", unique=True)
+
+
 @app.get("/")
 async def index() -> str:
     """ sanity test that this file is loaded """
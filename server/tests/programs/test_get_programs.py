@@ -9,3 +9,23 @@ def test_sanity():
     for key, value in programs.items():
         assert re.match(r"[0-9]{4}", key)
         assert type(value) is str
+
+def test_not_modified():
+    x = requests.get('http://127.0.0.1:8000/programs/getPrograms')
+    assert x.status_code == 200
+    etag = x.headers['ETag']
+    assert etag.startswith('W/')
+
+    y = requests.get('http://127.0.0.1:8000/programs/getPrograms', headers={'If-None-Match': etag})
+    assert y.status_code == 304
+    assert y.content == b''
+
+def test_stale_etag():
+    x = requests.get('http://127.0.0.1:8000/programs/getPrograms', headers={'If-None-Match': 'W/"stale"'})
+    assert x.status_code == 200
+    assert x.json()['programs']
+
+def test_wildcard_etag():
+    x = requests.get('http://127.0.0.1:8000/programs/getPrograms', headers={'If-None-Match': '*'})
+    assert x.status_code == 304
+    assert x.content == b''
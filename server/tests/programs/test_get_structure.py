@@ -6,6 +6,8 @@ import requests
 from hypothesis import given, settings
 from hypothesis.strategies import composite, sampled_from
 
+from server.routers.utility import course_list_from_structure
+
 programs = [
     *requests.get("http://127.0.0.1:8000/programs/getPrograms")
     .json()["programs"]
@@ -62,3 +64,17 @@ def test_all_specs_fetched(specifics):
     if specifics[1].endswith("2") or specifics[2].endswith("2"):
         key_to_fetch = next(k for k in structure.json()["structure"].keys() if "Minor" in k)
         assert structure.json()["structure"][key_to_fetch] is not None
+
+
+def test_course_list_skips_container_fields():
+    # a container whose title contains "courses" is not itself a list of courses
+    structure = {
+        "General": {
+            "name": "General Program Requirements",
+            "content": {
+                "Core Courses": {"UOC": 12, "courses": {"INFS1602": "", "INFS1603": ""}, "type": "", "notes": ""},
+                "Information Systems core courses": {"UOC": 6, "courses": {"INFS2603": ""}, "type": "", "notes": ""},
+            },
+        },
+    }
+    assert course_list_from_structure(structure) == ["INFS1602", "INFS1603", "INFS2603"]